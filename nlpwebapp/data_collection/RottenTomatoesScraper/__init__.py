@@ -1 +1,2 @@
 from .scraper import RottenTomatoesScraper
+from .api import RottenTomatoesAPIScraper
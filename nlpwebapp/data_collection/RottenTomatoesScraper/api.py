@@ -0,0 +1,54 @@
+import re
+
+# STAR_4 -> 4, STAR_4_5 -> 4.5
+_STAR_RATING = re.compile(r"STAR_(\d)(_5)?")
+
+
+def _numeric_rating(review: dict):
+    """Return the rating of an API review out of 5, or None if it has none.
+
+    RT sends ratings as enums such as STAR_4_5, falling back to the numeric
+    score field when the rating can't be read.
+    """
+    rating = review.get("rating")
+    if isinstance(rating, str):
+        match = _STAR_RATING.fullmatch(rating)
+        if match:
+            return int(match.group(1)) + (0.5 if match.group(2) else 0)
+    for value in (rating, review.get("score")):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class RottenTomatoesAPIScraper:
+    def __init__(self, title: str, pages: list):
+        """Read movie review text and ratings from RT's user reviews API.
+
+        Args:
+            title (str): Title of movie.
+            pages (list): Decoded JSON pages from the user reviews endpoint.
+
+        Raises:
+            AttributeError: Raised if no rated reviews are found in the pages.
+        """
+        # Only keep reviews that have both parts so text and scores stay aligned
+        self.review_scores: list = []
+        self.review_text: list = []
+        for page in pages:
+            for review in page.get("reviews") or ():
+                rating = _numeric_rating(review)
+                text = review.get("review") or review.get("quote")
+                if text and rating is not None:
+                    self.review_scores.append(rating)
+                    self.review_text.append(text)
+        if not self.review_scores:
+            raise AttributeError("No reviews were found in the API response.")
+        self.title: str = title
+
+    def as_triple(self) -> tuple:
+        """Return title, review text and scores without repeating the title.
+        """
+        return self.title, self.review_text, self.review_scores
@@ -1,5 +1,81 @@
-import bs4
-from bs4 import BeautifulSoup
+import lxml.etree
+import lxml.html
+import numpy as np
+
+# Comments and processing instructions are never read, so don't build nodes for them
+_HTML_PARSER = lxml.html.HTMLParser(remove_comments=True, remove_pis=True)
+
+# Compiled once at import so every page reuses the same XPath programs
+# String results are never traced back to their element, so skip smart strings
+_TITLE_XP = lxml.etree.XPath(
+    "string(//h2[contains(@class,'panel-heading')])", smart_strings=False
+)
+# RT renders these elements with exactly this class attribute, which XPath can
+# compare directly; the tokenized versions run if a cheap tokenized count shows
+# the exact ones missed part of the page
+_REVIEW_EXACT_XP = lxml.etree.XPath("//p[@class='audience-reviews__review']")
+_REVIEW_XP = lxml.etree.XPath(
+    "//p[contains(concat(' ',normalize-space(@class),' '),"
+    "' audience-reviews__review ')]"
+)
+_REVIEW_COUNT_XP = lxml.etree.XPath(
+    "count(//p[contains(concat(' ',normalize-space(@class),' '),"
+    "' audience-reviews__review ')])"
+)
+# Classes of every star-display and of its stars, in document order
+_STAR_CLASSES_EXACT_XP = lxml.etree.XPath(
+    "//span[@class='star-display']/@class | //span[@class='star-display']/*/@class",
+    smart_strings=False,
+)
+_STAR_CLASSES_XP = lxml.etree.XPath(
+    "//*[contains(concat(' ',normalize-space(@class),' '),' star-display ')]/@class"
+    " | //*[contains(concat(' ',normalize-space(@class),' '),' star-display ')]"
+    "/*/@class",
+    smart_strings=False,
+)
+_STAR_COUNT_XP = lxml.etree.XPath(
+    "count(//*[contains(concat(' ',normalize-space(@class),' '),' star-display ')])"
+)
+
+
+def _segment(star_classes: list) -> tuple:
+    """Find where each star-display starts in a list of star classes.
+
+    Args:
+        star_classes (list): Classes of star-displays, each followed by its stars.
+
+    Returns:
+        tuple: Whitespace-normalised classes and indexes of the star-displays.
+    """
+    # Split tokens on any whitespace, as normalize-space does in the XPath
+    classes = np.array([" ".join(c.split()) for c in star_classes], dtype=str)
+    padded = np.char.add(np.char.add(" ", classes), " ")
+    starts = np.flatnonzero(np.char.find(padded, " star-display ") >= 0)
+    return classes, starts
+
+
+def _score(classes: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Sum the stars of each star-display found by _segment.
+
+    Args:
+        classes (np.ndarray): Whitespace-normalised star classes.
+        starts (np.ndarray): Indexes of the star-displays in classes.
+
+    Returns:
+        np.ndarray: Score of each star-display.
+    """
+    # Each star-display is followed by its stars, so one reduceat segment
+    # per display sums its stars; the display's own class is worth 0
+    star_values = np.where(
+        np.char.find(classes, "star-display__filled") >= 0,
+        np.float32(1),
+        np.where(
+            np.char.find(classes, "star-display__half") >= 0,
+            np.float32(0.5),
+            np.float32(0),
+        ),
+    )
+    return np.add.reduceat(star_values, starts)
 
 
 class RottenTomatoesScraper:
@@ -7,47 +83,47 @@ class RottenTomatoesScraper:
         """Scrape movie review text and ratings from content.
 
         Args:
-            content (bytes): [description]
+            content (bytes): HTML source of a user reviews page.
+
+        Raises:
+            AttributeError: Raised if review text and scores don't line up.
         """
-        soup = BeautifulSoup(content, "lxml")
-        self.review_scores: list = self.extract_review_scores(soup)
-        self.review_text: list = self.extract_review_text(soup)
-        self.title: str = self.extract_movie_title(soup)
-        self.titles: list = [self.title for review in self.review_scores]
-
-    def to_dict(self):
-        """Return Pandas-compatible dictionary of reviews.
+        tree = lxml.html.fromstring(content, parser=_HTML_PARSER)
+        self.review_scores: np.ndarray = self.extract_review_scores(tree)
+        self.review_text: list = self.extract_review_text(tree)
+        self.title: str = self.extract_movie_title(tree)
+        if len(self.review_text) != len(self.review_scores):
+            raise AttributeError("Review text and scores in the content don't match.")
+
+    def as_triple(self) -> tuple:
+        """Return title, review text and scores without repeating the title.
         """
-        return {
-            "Title": self.titles,
-            "Review Text": self.review_text,
-            "Score": self.review_scores,
-        }
+        return self.title, self.review_text, self.review_scores
 
-    def extract_movie_title(self, soup: BeautifulSoup) -> str:
-        """Extract movie title text from given soup.
+    def extract_movie_title(self, tree: lxml.html.HtmlElement) -> str:
+        """Extract movie title text from given tree.
 
         Args:
-            soup (BeautifulSoup): Soup of source page.
+            tree (lxml.html.HtmlElement): Root element of source page.
 
         Raises:
-            NotFoundError: Raised if movie title is not found.
+            AttributeError: Raised if movie title is not found.
 
         Returns:
             str: Title of movie.
         """
-        title_dirty: str = soup.find("h2", class_="panel-heading").text
+        title_dirty: str = _TITLE_XP(tree)
         if not title_dirty:
             raise AttributeError("No movie title was found in the content.")
         # Fake Movie Title R̶e̶v̶i̶e̶w̶s̶
         title = title_dirty[:-8]
         return title
 
-    def extract_review_text(self, soup: BeautifulSoup) -> list:
-        """Extract text from reviews on given soup.
+    def extract_review_text(self, tree: lxml.html.HtmlElement) -> list:
+        """Extract text from reviews on given tree.
 
         Args:
-            soup (BeautifulSoup): Soup of source page.
+            tree (lxml.html.HtmlElement): Root element of source page.
 
         Raises:
             AttributeError: Raised if no review texts are found.
@@ -55,61 +131,62 @@ class RottenTomatoesScraper:
         Returns:
             list: List of text from reviews.
         """
-        reviews = soup.find_all("p", class_="audience-reviews__review")
+        reviews = _REVIEW_EXACT_XP(tree)
+        # Reviews with extra class tokens are missed by the exact selector
+        if len(reviews) != _REVIEW_COUNT_XP(tree):
+            reviews = _REVIEW_XP(tree)
 
         if not reviews:
             raise AttributeError("No review text was found in the content.")
 
-        review_text = [review.text for review in reviews]
+        review_text = [review.text_content() for review in reviews]
         return review_text
 
-    def extract_review_scores(self, soup: BeautifulSoup) -> list:
-        """Extract scores out of 5 from reviews on given soup.
+    def extract_review_scores(self, tree: lxml.html.HtmlElement) -> np.ndarray:
+        """Extract scores out of 5 from reviews on given tree.
 
         Args:
-            soup (BeautifulSoup): Soup of source page.
+            tree (lxml.html.HtmlElement): Root element of source page.
 
         Raises:
             AttributeError: Raised if no star-display HTML tags are found.
 
         Returns:
-            list: List of scores
+            np.ndarray: Array of scores
         """
         # star-display is the HTML class RT uses for the stars
-        star_displays = soup.find_all(class_="star-display")
+        classes, starts = _segment(_STAR_CLASSES_EXACT_XP(tree))
+        # Displays with extra class tokens or other tags are missed by the exact
+        # selector
+        if starts.size != _STAR_COUNT_XP(tree):
+            classes, starts = _segment(_STAR_CLASSES_XP(tree))
 
-        if not star_displays:
+        if not starts.size:
             raise AttributeError("No star-display tags were found in the content.")
 
-        review_scores = [
-            self.calculate_score(star_display) for star_display in star_displays
-        ]
+        review_scores = _score(classes, starts)
         return review_scores
 
-    def calculate_score(self, star_display: bs4.element.Tag) -> int:
+    def calculate_score(self, star_display: lxml.html.HtmlElement) -> float:
         """Calculate numerical score from number of star-display elements.
 
         Args:
-            star_display (bs4.element.Tag): RT website class for star-display's
+            star_display (lxml.html.HtmlElement): RT website class for star-display's
 
         Raises:
-            TypeError: Raised if input is not of type bs4.element.Tag
+            TypeError: Raised if input is not of type lxml.html.HtmlElement
             TypeError: Raised if tag is not of class 'star-display'
 
         Returns:
-            int: Numerical score.
+            float: Numerical score.
         """
-        if not isinstance(star_display, bs4.element.Tag):
-            raise TypeError("Input must be of type bs4.element.Tag")
-        if not star_display["class"][0] == "star-display":
+        if not isinstance(star_display, lxml.html.HtmlElement):
+            raise TypeError("Input must be of type lxml.html.HtmlElement")
+        star_classes = [star_display.get("class") or ""]
+        star_classes += [star.get("class") or "" for star in star_display]
+        classes, starts = _segment(star_classes)
+        if not starts.size or starts[0] != 0:
             raise TypeError("Tag must be of class 'star-display'")
 
-        full_star_count = len(
-            star_display.find_all(class_="star-display__filled", recursive=False)
-        )
-        half_star_count = len(
-            star_display.find_all(class_="star-display__half", recursive=False)
-        )  # NOTE: Not too sure if BS4 has inbuilt function for this
-
-        score = full_star_count + (half_star_count * 0.5)
+        score = float(_score(classes, starts[:1])[0])
         return score
@@ -1,11 +1,18 @@
+import asyncio
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Optional
 from timeit import default_timer as timer
 
-import grequests
+import httpx
+import lxml.etree
+import numpy as np
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 
-from RottenTomatoesScraper import RottenTomatoesScraper
+from RottenTomatoesScraper import RottenTomatoesAPIScraper, RottenTomatoesScraper
 
 safari_header = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_4) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/13.1 Safari/605.1.15",
@@ -13,7 +20,6 @@ safari_header = {
     "Accept-Charset": "ISO-8859-1,utf-8;q=0.7,*;q=0.3",
     "Accept-Encoding": "none",
     "Accept-Language": "en-CA,en;q=0.8",
-    "Connection": "keep-alive",
 }
 firefox_header = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.6; rv:16.0) Gecko/20100101 Firefox/16.0",
@@ -21,9 +27,61 @@ firefox_header = {
     "Accept-Charset": "ISO-8859-1,utf-8;q=0.7,*;q=0.3",
     "Accept-Encoding": "none",
     "Accept-Language": "en-CA,en;q=0.8",
-    "Connection": "keep-alive",
 }
 RT_url = "https://www.rottentomatoes.com"
+# Requests in flight at once when the server falls back to HTTP/1.1
+MAX_CONNECTIONS = 50
+# Seconds a year's scraped reviews are reused before scraping again
+CACHE_TTL = 24 * 60 * 60
+
+# Compiled once at import instead of re-parsing the expression for every tag
+_MOVIE_PATH_XP = lxml.etree.XPath("string(.//a/@href)", smart_strings=False)
+_MOVIE_TITLE_XP = lxml.etree.XPath("normalize-space(.//a)", smart_strings=False)
+# Fake Movie Title (2019)
+_YEAR_SUFFIX = re.compile(r"\s*\(\d{4}\)$")
+# The review API is keyed on the movie's EMS id, found in its page's JSON data
+_EMS_ID = re.compile(r'"emsId"\s*:\s*"([0-9a-fA-F-]{36})"')
+
+
+def _stream_movie_tags(src: httpx.Response, chunk_size=16384) -> list:
+    """Parse movie rows out of the top 100 page while it is being received.
+
+    Rows without a class are detached and kept as they finish parsing, every
+    other finished element is cleared so the live tree stays small.
+
+    Args:
+        src (httpx.Response): Streaming response of the top 100 movies page.
+        chunk_size (int, optional): Bytes fed to the parser at a time.
+
+    Returns:
+        list: Top 100 movies HTML tags.
+    """
+    parser = lxml.etree.HTMLPullParser(events=("start", "end"))
+    movie_tags = []
+    open_rows = 0
+
+    def handle_events():
+        nonlocal open_rows
+        for event, elem in parser.read_events():
+            if elem.tag == "tr":
+                if event == "start":
+                    open_rows += 1
+                    continue
+                open_rows -= 1
+                if elem.get("class") is None:
+                    elem.getparent().remove(elem)
+                    movie_tags.append(elem)
+                else:
+                    elem.clear()
+            elif event == "end" and not open_rows:
+                elem.clear()
+
+    for chunk in src.iter_bytes(chunk_size):
+        parser.feed(chunk)
+        handle_events()
+    parser.close()
+    handle_events()
+    return movie_tags
 
 
 def get_top_100_movie_tags(year=2019, headers: dict = None):
@@ -35,45 +93,172 @@ def get_top_100_movie_tags(year=2019, headers: dict = None):
         Defaults to Macbook-Safari.
 
     Returns:
-        bs4.element.ResultSet: Top 100 movies HTML tags.
+        list: Top 100 movies HTML tags.
     """
     if not headers:
         headers = safari_header
     top_movies_page = f"/top/bestofrt/?year={year}"
     print(f"Requesting top 100 movies' tags from year: {year}", end="  ->  ")
-    src = requests.get(f"{RT_url}{top_movies_page}", headers=headers)
-    src.raise_for_status()
-    print("Succesfully got response from Rotten Tomatoes.")
-    content = src.content
-    soup = BeautifulSoup(content, "lxml")
-    movie_tags = soup.find_all("tr", class_=None)
+    with httpx.stream(
+        "GET",
+        f"{RT_url}{top_movies_page}",
+        headers=headers,
+        follow_redirects=True,
+        timeout=30,
+    ) as src:
+        src.raise_for_status()
+        print("Succesfully got response from Rotten Tomatoes.")
+        movie_tags = _stream_movie_tags(src)
     if not movie_tags:
         raise AttributeError("No movie tags were found, check URL?")
     print("  Succesfully gathered movie tags.")
     return movie_tags
 
 
-def get_user_review_urls_from_tags(movie_tags) -> list:
-    """Get URL's of movie user reviews from HTML tags.
+def get_movies_from_tags(movie_tags) -> list:
+    """Get title and user review URL's of each movie from HTML tags.
 
     Args:
-        movie_tags (bs4.element.ResultSet): Top 100 movies HTML tags.
+        movie_tags (list): Top 100 movies HTML tags.
 
     Returns:
-        list: List of URL's.
+        list: List of (title, review page URL, movie page URL) tuples.
     """
     user_review_page = "/reviews?type=user"
-    urls = []
+    movies = []
     for tag in movie_tags:
-        try:
-            movie_path = tag.a["href"]
-        except TypeError:
+        movie_path = _MOVIE_PATH_XP(tag)
+        if not movie_path:
             print("    Skipping invalid HTML element.")
             continue
+        title = _YEAR_SUFFIX.sub("", _MOVIE_TITLE_XP(tag))
         url = f"{RT_url}{movie_path}{user_review_page}"
-        urls.append(url)
+        movie_url = f"{RT_url}{movie_path}"
+        movies.append((title, url, movie_url))
     print("  Succesfully gathered all user review URL's.")
-    return urls
+    return movies
+
+
+def _async_client(headers: dict) -> httpx.AsyncClient:
+    """Create the pooled HTTP/2 client shared by all concurrent requests.
+
+    Args:
+        headers (dict): User-Agent headers for requests.
+
+    Returns:
+        httpx.AsyncClient: Client, to be used as an async context manager.
+    """
+    # Over HTTP/2 all requests share one multiplexed connection; the limits
+    # only come into play for HTTP/1.1, where each request needs its own
+    limits = httpx.Limits(max_keepalive_connections=20, max_connections=MAX_CONNECTIONS)
+    return httpx.AsyncClient(
+        http2=True, headers=headers, limits=limits, timeout=30, follow_redirects=True,
+    )
+
+
+async def _fetch_api_pages(client: httpx.AsyncClient, movie_url: str, max_pages: int):
+    """Follow the user reviews API's cursor to collect pages of reviews.
+
+    Args:
+        client (httpx.AsyncClient): Client to send requests with.
+        movie_url (str): URL of the movie's page, which holds its EMS id.
+        max_pages (int): Maximum number of API pages to request.
+
+    Returns:
+        list: Decoded JSON pages, empty if the API did not serve the movie.
+    """
+    response = await client.get(movie_url)
+    match = _EMS_ID.search(response.text) if response.status_code == 200 else None
+    if not match:
+        return []
+    api_url = f"{RT_url}/napi/movie/{match.group(1)}/reviews/user"
+    pages = []
+    params = {"pageCount": 50}
+    for _ in range(max_pages):
+        response = await client.get(api_url, params=params)
+        if response.status_code != 200:
+            break
+        try:
+            page = response.json()
+        except ValueError:
+            break
+        pages.append(page)
+        page_info = page.get("pageInfo") or {}
+        if not page_info.get("hasNextPage") or not page_info.get("endCursor"):
+            break
+        params = {"pageCount": 50, "after": page_info["endCursor"]}
+    return pages
+
+
+async def _fetch_all_api(movies, headers: dict, max_pages: int) -> list:
+    """Fetch review API pages of all movies concurrently.
+
+    Args:
+        movies (list): List of (title, review page URL, movie page URL) tuples.
+        headers (dict): User-Agent headers for requests.
+        max_pages (int): Maximum number of API pages to request per movie.
+
+    Returns:
+        list: Pages of each movie, or the exception raised for failed movies.
+    """
+    async with _async_client(headers) as client:
+        return await asyncio.gather(
+            *(
+                _fetch_api_pages(client, movie_url, max_pages)
+                for _, _, movie_url in movies
+            ),
+            return_exceptions=True,
+        )
+
+
+def get_api_reviews(movies, headers: dict = None, max_pages=5):
+    """Get user reviews from Rotten Tomatoes' JSON API.
+
+    Args:
+        movies (list): List of (title, review page URL, movie page URL) tuples.
+        headers (dict, optional): User-Agent headers for requests.
+        Defaults to Macbook-Safari.
+        max_pages (int, optional): Maximum number of API pages to request per
+        movie.
+        Defaults to 5.
+
+    Returns:
+        tuple: Reviews of movies served by the API, and review page URL's of
+        the movies that have to be scraped instead.
+    """
+    if not headers:
+        headers = safari_header
+    print("Fetching reviews from API...", end="  ->  ")
+    results = asyncio.run(_fetch_all_api(movies, headers, max_pages))
+    movie_reviews = []
+    missing_urls = []
+    for (title, url, _), pages in zip(movies, results):
+        if isinstance(pages, Exception):
+            print(f"Request failed:\n{pages}")
+            missing_urls.append(url)
+            continue
+        try:
+            movie_reviews.append(RottenTomatoesAPIScraper(title, pages))
+        except AttributeError:
+            missing_urls.append(url)
+    print(f"Got reviews of {len(movie_reviews)} movies from the API.")
+    return movie_reviews, missing_urls
+
+
+async def _fetch_all(urls, headers: dict) -> list:
+    """Fetch all URL's concurrently over one pooled HTTP/2 client.
+
+    Args:
+        urls (list): List of URL's.
+        headers (dict): User-Agent headers for requests.
+
+    Returns:
+        list: Responses, or the exception raised for each failed request.
+    """
+    async with _async_client(headers) as client:
+        return await asyncio.gather(
+            *(client.get(url) for url in urls), return_exceptions=True
+        )
 
 
 def get_responses(urls, headers: dict = None, retry=False):
@@ -90,12 +275,16 @@ def get_responses(urls, headers: dict = None, retry=False):
     if not headers:
         headers = safari_header
     print("Fetching responses...", end="  ->  ")
-    reqs = (grequests.get(url, headers=headers) for url in urls)
-    handler = lambda request, exception: print(f"Request failed:\n{exception}")
     start_time = timer()
-    responses = grequests.map(reqs, size=10, exception_handler=handler)
+    results = asyncio.run(_fetch_all(urls, headers))
     end_time = timer()
     tot_time = int(end_time - start_time)
+    responses = []
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"Request failed:\n{result}")
+        else:
+            responses.append(result)
     for response in responses:
         if response.status_code == 403:
             if not retry:
@@ -105,7 +294,7 @@ def get_responses(urls, headers: dict = None, retry=False):
                 responses = get_responses(urls, firefox_header, retry=True)
                 return responses
             else:
-                raise requests.exceptions.HTTPError(
+                raise httpx.HTTPError(
                     "Received 403 error again: check size, headers, and URL's"
                 )
 
@@ -116,40 +305,100 @@ def get_responses(urls, headers: dict = None, retry=False):
     return responses
 
 
-def generate_df(responses) -> pd.DataFrame:
-    """Create pandas dataframe from grequest's responses.
+def _parse_one(content: bytes):
+    """Parse one user reviews page in a worker process.
+
+    Args:
+        content (bytes): HTML source of a user reviews page.
+
+    Returns:
+        tuple: Title, review text and scores, or None if no reviews were found.
+    """
+    try:
+        movie_data = RottenTomatoesScraper(content)
+    except (AttributeError, lxml.etree.ParserError):
+        return None
+    return movie_data.as_triple()
+
+
+def generate_df(responses, movie_reviews=()) -> pd.DataFrame:
+    """Create pandas dataframe from httpx responses.
 
     Args:
         responses
+        movie_reviews (list, optional): Reviews already read from the API.
 
     Returns:
         pd.DataFrame: Dataframe including movie title, review text and scores
     """
-    df = pd.DataFrame()
-    titles = []
-    review_text = []
-    review_scores = []
+    parsed = [movie_data.as_triple() for movie_data in movie_reviews]
     print("Parsing user reviews...")
-    for response in responses:
-        try:
-            movie_data = RottenTomatoesScraper(response.content)
-        except AttributeError:
+    contents = [response.content for response in responses]
+    # Each page parses independently, so spread the CPU-bound work over all cores
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = list(executor.map(_parse_one, contents, chunksize=4))
+    for response, movie_data in zip(responses, results):
+        if movie_data is None:
             print(f"  No reviews found for url: {response.url}")
-            response.close()
             continue
-        titles.extend(movie_data.titles)
-        review_text.extend(movie_data.review_text)
-        review_scores.extend(movie_data.review_scores)
-        response.close()
+        parsed.append(movie_data)
+
+    counts = np.array([len(scores) for _, _, scores in parsed], dtype=int)
+    review_text = np.array(
+        list(chain.from_iterable(text for _, text, _ in parsed)), dtype=object
+    )
+    review_scores = np.concatenate(
+        [np.asarray(scores, dtype=np.float32) for _, _, scores in parsed]
+        or [np.empty(0, dtype=np.float32)]
+    )
+    # Store each title once and give every review a small code pointing to it
+    movie_titles = [movie_title for movie_title, _, _ in parsed]
+    categories = list(dict.fromkeys(movie_titles))
+    category_codes = {title: code for code, title in enumerate(categories)}
+    codes = np.repeat([category_codes[title] for title in movie_titles], counts)
+    titles = pd.Categorical.from_codes(codes, categories=categories)
     data = {"Title": titles, "Review Text": review_text, "Review Score": review_scores}
-    df = pd.DataFrame.from_dict(data)
+    df = pd.DataFrame(data, copy=False)
     return df
 
 
+def load_cached_df(year: int, max_age: float = CACHE_TTL) -> Optional[pd.DataFrame]:
+    """Load reviews of a year scraped by a previous run, if still fresh.
+
+    Args:
+        year (int): Year of charts the reviews were scraped from.
+        max_age (float, optional): Maximum age of the cache in seconds.
+        Defaults to a day.
+
+    Returns:
+        pd.DataFrame: Cached reviews, or None if there are none fresh enough.
+    """
+    path = f"movie_reviews{year}.parquet"
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return None
+    if age > max_age:
+        return None
+    print(f"Using reviews cached {int(age)} seconds ago in {path}")
+    return pd.read_parquet(path)
+
+
 if __name__ == "__main__":
     year = int(input("Year of charts to scrape: "))
-    movie_tags = get_top_100_movie_tags(year=year)
-    urls = get_user_review_urls_from_tags(movie_tags)
-    responses = get_responses(urls)
-    df: pd.DataFrame = generate_df(responses)
-    df.to_csv(f"movie_reviews{year}.csv")
+    df: Optional[pd.DataFrame] = load_cached_df(year)
+    if df is None:
+        movie_tags = get_top_100_movie_tags(year=year)
+        movies = get_movies_from_tags(movie_tags)
+        movie_reviews, urls = get_api_reviews(movies)
+        # Scrape the review pages of movies the API has no reviews for
+        responses = []
+        if urls:
+            try:
+                responses = get_responses(urls)
+            except AttributeError:
+                # Keep the reviews already read from the API
+                print("No review pages could be fetched.")
+        df = generate_df(responses, movie_reviews)
+        df.to_parquet(f"movie_reviews{year}.parquet")
+    df.to_csv(f"movie_reviews{year}.csv", chunksize=10000)
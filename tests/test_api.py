@@ -0,0 +1,55 @@
+import pytest
+
+from nlpwebapp.data_collection.RottenTomatoesScraper import RottenTomatoesAPIScraper
+
+
+def test_reviews_across_pages():
+    pages = [
+        {"reviews": [{"review": "Great", "rating": 4.5}]},
+        {"reviews": [{"review": "Fine", "rating": "3"}]},
+    ]
+    movie_data = RottenTomatoesAPIScraper("Fake Movie", pages)
+    assert movie_data.as_triple() == ("Fake Movie", ["Great", "Fine"], [4.5, 3.0])
+
+
+def test_star_enum_ratings_are_scored():
+    pages = [
+        {
+            "reviews": [
+                {"quote": "Great", "rating": "STAR_4_5"},
+                {"quote": "Bad", "rating": "STAR_0_5"},
+                {"quote": "Perfect", "rating": "STAR_5"},
+            ]
+        }
+    ]
+    movie_data = RottenTomatoesAPIScraper("Fake Movie", pages)
+    assert movie_data.review_text == ["Great", "Bad", "Perfect"]
+    assert movie_data.review_scores == [4.5, 0.5, 5.0]
+
+
+def test_score_field_is_used_for_unreadable_ratings():
+    pages = [{"reviews": [{"review": "Good", "rating": "UNKNOWN", "score": 3.5}]}]
+    movie_data = RottenTomatoesAPIScraper("Fake Movie", pages)
+    assert movie_data.review_scores == [3.5]
+
+
+def test_unusable_reviews_are_skipped():
+    pages = [
+        {
+            "reviews": [
+                {"review": "Great", "rating": 5},
+                {"review": "No rating", "rating": None},
+                {"review": "Unreadable rating", "rating": "N/A"},
+                {"review": "", "rating": 2},
+            ]
+        }
+    ]
+    movie_data = RottenTomatoesAPIScraper("Fake Movie", pages)
+    assert movie_data.review_text == ["Great"]
+    assert movie_data.review_scores == [5.0]
+
+
+def test_no_rated_reviews_raises():
+    pages = [{"reviews": [{"review": "Unreadable rating", "rating": "N/A"}]}]
+    with pytest.raises(AttributeError):
+        RottenTomatoesAPIScraper("Fake Movie", pages)
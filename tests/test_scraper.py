@@ -0,0 +1,124 @@
+import lxml.html
+import pytest
+
+from nlpwebapp.data_collection.RottenTomatoesScraper import RottenTomatoesScraper
+
+FULL = '<span class="star-display__filled"></span>'
+HALF = '<span class="star-display__half"></span>'
+EMPTY = '<span class="star-display__empty"></span>'
+
+
+def display(stars, class_="star-display"):
+    return f'<span class="{class_}">{stars}</span>'
+
+
+def page(displays):
+    reviews = "".join(
+        f'<li>{star_display}<p class="audience-reviews__review">Review {i}</p></li>'
+        for i, star_display in enumerate(displays)
+    )
+    return (
+        "<html><body><h2 class='panel-heading'>Fake Movie Reviews</h2>"
+        f"<ul>{reviews}</ul></body></html>"
+    ).encode()
+
+
+def scores(displays):
+    return RottenTomatoesScraper(page(displays)).review_scores.tolist()
+
+
+def test_scores_several_displays():
+    displays = [
+        display(FULL * 5),
+        display(FULL * 2 + HALF + EMPTY * 2),
+        display(HALF + EMPTY * 4),
+    ]
+    assert scores(displays) == [5.0, 2.5, 0.5]
+
+
+def test_display_without_stars_scores_zero():
+    displays = [display(FULL * 3), display(""), display(FULL)]
+    assert scores(displays) == [3.0, 0.0, 1.0]
+
+
+def test_children_without_class_are_ignored():
+    displays = [display("<i></i>" + FULL + '<b class="icon"></b>' + HALF)]
+    assert scores(displays) == [1.5]
+
+
+def test_tokenized_display_classes():
+    displays = [
+        display(FULL * 4, class_="star-display large"),
+        display(HALF, class_="review star-display"),
+    ]
+    assert scores(displays) == [4.0, 0.5]
+
+
+@pytest.mark.parametrize(
+    "class_", ["star-display\nlarge", "star-display\tlarge", "\tstar-display  "]
+)
+def test_whitespace_in_display_classes(class_):
+    displays = [display(FULL * 2, class_=class_), display(FULL + HALF, class_=class_)]
+    assert scores(displays) == [2.0, 1.5]
+
+
+def test_no_displays_raises():
+    with pytest.raises(AttributeError):
+        scores([])
+
+
+def test_scraper_reads_whole_page():
+    displays = [display(FULL * 4 + HALF), display(FULL)]
+    movie_data = RottenTomatoesScraper(page(displays))
+    title, review_text, review_scores = movie_data.as_triple()
+    assert title == "Fake Movie"
+    assert review_text == ["Review 0", "Review 1"]
+    assert review_scores.tolist() == [4.5, 1.0]
+
+
+def test_mixed_exact_and_tokenized_classes():
+    displays = [display(FULL * 3), display(FULL + HALF, class_="star-display large")]
+    assert scores(displays) == [3.0, 1.5]
+
+
+def test_mixed_review_classes():
+    content = page([display(FULL * 2), display(HALF)]).replace(
+        b'<p class="audience-reviews__review">Review 1',
+        b'<p class="audience-reviews__review long">Review 1',
+    )
+    movie_data = RottenTomatoesScraper(content)
+    assert movie_data.review_text == ["Review 0", "Review 1"]
+    assert movie_data.review_scores.tolist() == [2.0, 0.5]
+
+
+def test_equally_mixed_review_and_display_classes():
+    displays = [display(FULL * 2), display(HALF, class_="star-display large")]
+    content = page(displays).replace(
+        b'<p class="audience-reviews__review">Review 1',
+        b'<p class="audience-reviews__review long">Review 1',
+    )
+    movie_data = RottenTomatoesScraper(content)
+    assert movie_data.review_text == ["Review 0", "Review 1"]
+    assert movie_data.review_scores.tolist() == [2.0, 0.5]
+
+
+def test_displays_on_other_tags():
+    content = page([display(FULL * 2), display(HALF)]).replace(
+        b'<span class="star-display">', b'<div class="star-display">', 1
+    )
+    assert RottenTomatoesScraper(content).review_scores.tolist() == [2.0, 0.5]
+
+
+def test_calculate_score_of_single_display():
+    content = page([display(FULL * 3 + HALF + EMPTY)])
+    star_display = lxml.html.fromstring(content).find_class("star-display")[0]
+    assert RottenTomatoesScraper(content).calculate_score(star_display) == 3.5
+
+
+@pytest.mark.parametrize("star_display", ["<i></i>", '<span class="other"></span>'])
+def test_calculate_score_rejects_other_tags(star_display):
+    movie_data = RottenTomatoesScraper(page([display(FULL)]))
+    with pytest.raises(TypeError):
+        movie_data.calculate_score(lxml.html.fromstring(star_display))
+    with pytest.raises(TypeError):
+        movie_data.calculate_score(star_display)
@@ -0,0 +1,144 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+
+# The script imports its scraper package relative to its own directory
+sys.path.insert(0, str(Path(__file__).parents[1] / "nlpwebapp" / "data_collection"))
+
+import top_100_movie_reviews  # noqa: E402
+
+EMS_ID = "0f0a34f8-3cd1-3bbe-a4ee-c1b6b7a64d82"
+MOVIE_URL = "https://www.rottentomatoes.com/m/fake_movie"
+API_URL = f"https://www.rottentomatoes.com/napi/movie/{EMS_ID}/reviews/user"
+MOVIE_PAGE = f'<script>{{"emsId":"{EMS_ID}","title":"Fake Movie"}}</script>'
+
+
+def fetch_api_pages(handler, max_pages=5):
+    async def fetch():
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await top_100_movie_reviews._fetch_api_pages(
+                client, MOVIE_URL, max_pages
+            )
+
+    return asyncio.run(fetch())
+
+
+def api_handler(pages):
+    requests = []
+
+    def handler(request):
+        if str(request.url) == MOVIE_URL:
+            return httpx.Response(200, text=MOVIE_PAGE)
+        requests.append(request.url.params.get("after"))
+        return pages[len(requests) - 1]
+
+    return handler, requests
+
+
+def test_api_pages_follow_cursor():
+    pages = [
+        httpx.Response(
+            200,
+            json={"reviews": [1], "pageInfo": {"hasNextPage": True, "endCursor": "a"}},
+        ),
+        httpx.Response(
+            200,
+            json={"reviews": [2], "pageInfo": {"hasNextPage": True, "endCursor": "b"}},
+        ),
+        httpx.Response(200, json={"reviews": [3], "pageInfo": {"hasNextPage": False}}),
+    ]
+    handler, requests = api_handler(pages)
+    result = fetch_api_pages(handler)
+    assert [page["reviews"] for page in result] == [[1], [2], [3]]
+    assert requests == [None, "a", "b"]
+
+
+def test_api_pages_stop_at_max_pages():
+    page = {"reviews": [1], "pageInfo": {"hasNextPage": True, "endCursor": "a"}}
+    handler, requests = api_handler([httpx.Response(200, json=page)] * 3)
+    assert len(fetch_api_pages(handler, max_pages=2)) == 2
+    assert len(requests) == 2
+
+
+def test_api_pages_stop_on_error_status():
+    pages = [
+        httpx.Response(
+            200,
+            json={"reviews": [1], "pageInfo": {"hasNextPage": True, "endCursor": "a"}},
+        ),
+        httpx.Response(500),
+    ]
+    handler, _ = api_handler(pages)
+    assert [page["reviews"] for page in fetch_api_pages(handler)] == [[1]]
+
+
+def test_api_pages_stop_on_invalid_json():
+    handler, _ = api_handler([httpx.Response(200, text="<html></html>")])
+    assert fetch_api_pages(handler) == []
+
+
+def test_api_is_keyed_on_ems_id():
+    urls = []
+
+    def handler(request):
+        urls.append(str(request.url).split("?")[0])
+        if str(request.url) == MOVIE_URL:
+            return httpx.Response(200, text=MOVIE_PAGE)
+        return httpx.Response(200, json={"reviews": []})
+
+    fetch_api_pages(handler)
+    assert urls == [MOVIE_URL, API_URL]
+
+
+def test_movie_without_ems_id_is_not_requested():
+    urls = []
+
+    def handler(request):
+        urls.append(str(request.url))
+        return httpx.Response(200, text="<html></html>")
+
+    assert fetch_api_pages(handler) == []
+    assert urls == [MOVIE_URL]
+
+
+LISTING = b"""<html><head><title>Top Movies</title></head><body>
+<div class="nav"><a href="/browse">Browse</a></div>
+<table class="table">
+<tr class="header"><th>Rank</th><th>Title</th></tr>
+<tr><td>1.</td><td><a href="/m/fake_movie" class="articleLink">Fake Movie (2019)</a></td></tr>
+<tr><td>2.</td><td>No link</td></tr>
+<tr><td>3.</td><td><a href="/m/other_movie">  Other Movie  (2019)</a></td></tr>
+</table>
+<footer><a href="/about">About</a></footer>
+</body></html>"""
+
+
+class FakeStream:
+    def iter_bytes(self, chunk_size):
+        for i in range(0, len(LISTING), 7):
+            yield LISTING[i : i + 7]
+
+
+def test_stream_keeps_unclassed_rows_in_order():
+    movie_tags = top_100_movie_reviews._stream_movie_tags(FakeStream(), chunk_size=7)
+    assert [tag.findtext("td") for tag in movie_tags] == ["1.", "2.", "3."]
+
+
+def test_movies_from_streamed_rows():
+    movie_tags = top_100_movie_reviews._stream_movie_tags(FakeStream(), chunk_size=7)
+    rt_url = top_100_movie_reviews.RT_url
+    assert top_100_movie_reviews.get_movies_from_tags(movie_tags) == [
+        (
+            "Fake Movie",
+            f"{rt_url}/m/fake_movie/reviews?type=user",
+            f"{rt_url}/m/fake_movie",
+        ),
+        (
+            "Other Movie",
+            f"{rt_url}/m/other_movie/reviews?type=user",
+            f"{rt_url}/m/other_movie",
+        ),
+    ]